@@ -0,0 +1,454 @@
+import urllib.request
+import urllib.parse
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BASE_URL = "http://localhost:8000"
+
+BENCH_TABLE = "bench_events"
+BENCH_COLUMNS = [
+    {"name": "id", "type": "BIGINT PRIMARY KEY"},
+    {"name": "category", "type": "VARCHAR"},
+    {"name": "amount", "type": "DECIMAL(10,2)"},
+    {"name": "created_at", "type": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"}
+]
+CATEGORIES = ["alpha", "beta", "gamma", "delta"]
+
+# 对比基线时，这些指标越大越好；其余（延迟、同步延迟）越小越好
+HIGHER_IS_BETTER = {"throughput", "success", "visible", "first_visible"}
+# 请求数、探测次数由配置决定，不参与对比
+NOT_COMPARED = {"requests", "probes"}
+
+
+def make_request(method, endpoint, data=None, params=None, timeout=30):
+    url = BASE_URL + endpoint
+
+    if params:
+        query_string = urllib.parse.urlencode(params)
+        url += f"?{query_string}"
+
+    if method == "GET":
+        req = urllib.request.Request(url)
+    else:
+        req = urllib.request.Request(url, method=method)
+        if data:
+            req.add_header('Content-Type', 'application/json')
+            req.data = json.dumps(data).encode('utf-8')
+
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        return {"error": f"HTTP Error {e.code}", "status_code": e.code}
+    except urllib.error.URLError as e:
+        return {"error": f"URL Error: {e.reason}", "status_code": 0}
+    except Exception as e:
+        return {"error": str(e), "status_code": 0}
+
+
+def percentile(sorted_values, pct):
+    """对已排序的列表取百分位（线性插值）"""
+    if not sorted_values:
+        return None
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies_ms, failures, elapsed_s):
+    values = sorted(latencies_ms)
+    total = len(values) + failures
+    return {
+        "requests": total,
+        "success": len(values),
+        "failed": failures,
+        "throughput": round(len(values) / elapsed_s, 2) if elapsed_s > 0 else 0,
+        "mean_ms": round(sum(values) / len(values), 2) if values else None,
+        "p50_ms": round(percentile(values, 50), 2) if values else None,
+        "p95_ms": round(percentile(values, 95), 2) if values else None,
+        "p99_ms": round(percentile(values, 99), 2) if values else None,
+        "max_ms": round(values[-1], 2) if values else None
+    }
+
+
+def modify_failed(response):
+    """批量写入部分失败时接口仍返回 200，需要同时检查 status 与 failed_operations"""
+    if response.get('error'):
+        return True
+    return response.get('status', 'success') != 'success' or response.get('failed_operations', 0) > 0
+
+
+def nodes_failed(node_results):
+    return any(not r.get('success', True) for r in node_results or [])
+
+
+def query_failed(response):
+    if response.get('error'):
+        return True
+    if response.get('cross_month'):
+        if response.get('successful_months') != response.get('total_months'):
+            return True
+        return any(nodes_failed(month.get('results')) for month in response.get('results') or [])
+    return nodes_failed(response.get('results'))
+
+
+def probe_visibility(response):
+    """返回 (是否有节点可见, 是否所有成功节点均可见)，节点查询失败时返回 None"""
+    if query_failed(response):
+        return None
+    counts = [(r.get('data') or {}).get('count', 0) for r in response.get('results') or []]
+    return any(c > 0 for c in counts), bool(counts) and all(c > 0 for c in counts)
+
+
+class IdAllocator:
+    """按固定起点分配主键，相同参数的多次运行得到相同的数据集"""
+
+    def __init__(self, start):
+        self._next = start
+        self._lock = threading.Lock()
+
+    def take(self, count=1):
+        with self._lock:
+            start = self._next
+            self._next += count
+            return start
+
+
+def reset(months, keep_rows):
+    """删除 id 大于 keep_rows 的行，清掉上次运行负载与探测写入的数据"""
+    for month in months:
+        response = make_request("POST", "/api/v1/modify/async", {
+            "exec": f"DELETE FROM {BENCH_TABLE} WHERE id > ?",
+            "params": [keep_rows],
+            "month": month
+        }, timeout=300)
+        if modify_failed(response):
+            raise RuntimeError(f"清理数据失败 ({month}): {response}")
+
+
+def seed(months, rows_per_month, batch_size, rng):
+    """重建每个月份的基准数据，主键固定为 1..rows_per_month"""
+    print(f"=== 准备数据: {len(months)} 个月份，每月 {rows_per_month} 行 ===")
+    for month in months:
+        response = make_request("POST", "/api/v1/tables", {
+            "table_name": BENCH_TABLE,
+            "columns": BENCH_COLUMNS,
+            "month": month
+        })
+        if response.get('error') and response.get('status_code') not in (400, 409):
+            raise RuntimeError(f"创建表失败 ({month}): {response}")
+
+    reset(months, 0)
+
+    for month in months:
+        inserted = 0
+        while inserted < rows_per_month:
+            count = min(batch_size, rows_per_month - inserted)
+            start_id = inserted + 1
+            response = make_request("POST", "/api/v1/modify/async", {
+                "exec": f"INSERT INTO {BENCH_TABLE} (id, category, amount) VALUES (?, ?, ?)",
+                "is_batch": True,
+                "month": month,
+                "batch_params": [
+                    [start_id + i, rng.choice(CATEGORIES), round(rng.uniform(1, 1000), 2)]
+                    for i in range(count)
+                ]
+            }, timeout=300)
+            if modify_failed(response):
+                raise RuntimeError(f"写入数据失败 ({month}): {response}")
+            inserted += count
+        print(f"月份 {month}: 已写入 {inserted} 行")
+
+
+def build_plan(months, total_requests, mix, ids, rng):
+    """预先生成全部请求 (类型, 接口, 请求体)，保证同一随机种子得到完全相同的负载"""
+    kinds = list(mix.keys())
+    weights = [mix[k] for k in kinds]
+    plan = []
+    for kind in rng.choices(kinds, weights=weights, k=total_requests):
+        month = rng.choice(months)
+        if kind == "read":
+            endpoint = "/api/v1/query/async"
+            payload = {
+                "query": f"SELECT category, COUNT(*), SUM(amount) FROM {BENCH_TABLE} WHERE category = ? GROUP BY category",
+                "params": [rng.choice(CATEGORIES)],
+                "month": month
+            }
+        elif kind == "write":
+            endpoint = "/api/v1/modify/async"
+            payload = {
+                "exec": f"INSERT INTO {BENCH_TABLE} (id, category, amount) VALUES (?, ?, ?)",
+                "params": [ids.take(), rng.choice(CATEGORIES), round(rng.uniform(1, 1000), 2)],
+                "month": month
+            }
+        else:
+            endpoint = "/api/v1/query/async"
+            payload = {
+                "query": f"SELECT COUNT(*) FROM {BENCH_TABLE}",
+                "months": months
+            }
+        plan.append((kind, endpoint, payload))
+    return plan
+
+
+def run_workload(plan, concurrency):
+    """按固定并发执行预先生成的混合负载，返回每类操作的延迟统计"""
+    kinds = list(dict.fromkeys(kind for kind, _, _ in plan))
+    latencies = {kind: [] for kind in kinds}
+    failures = {kind: 0 for kind in kinds}
+    lock = threading.Lock()
+
+    def one(item):
+        kind, endpoint, payload = item
+        start_time = time.perf_counter()
+        response = make_request("POST", endpoint, payload)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        failed = modify_failed(response) if kind == "write" else query_failed(response)
+        with lock:
+            if failed:
+                failures[kind] += 1
+            else:
+                latencies[kind].append(elapsed_ms)
+
+    print(f"\n=== 执行混合负载: {len(plan)} 个请求，并发 {concurrency} ===")
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, plan))
+    elapsed_s = time.perf_counter() - start_time
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    report = {"overall": summarize(all_latencies, sum(failures.values()), elapsed_s)}
+    for kind in kinds:
+        report[kind] = summarize(latencies[kind], failures[kind], elapsed_s)
+    report["overall"]["elapsed_s"] = round(elapsed_s, 3)
+    return report
+
+
+def lag_stats(prefix, lags):
+    lags = sorted(lags)
+    return {
+        f"{prefix}_mean_ms": round(sum(lags) / len(lags), 2) if lags else None,
+        f"{prefix}_p50_ms": round(percentile(lags, 50), 2) if lags else None,
+        f"{prefix}_p95_ms": round(percentile(lags, 95), 2) if lags else None,
+        f"{prefix}_max_ms": round(lags[-1], 2) if lags else None
+    }
+
+
+def measure_sync_lag(months, probes, poll_interval, max_wait, ids):
+    """写入一行后轮询查询，分别记录首个节点可见和所有节点可见的时间"""
+    print(f"\n=== 测量同步延迟: {probes} 次探测 ===")
+    first_lags = []
+    all_lags = []
+    timeouts = 0
+    write_failed = 0
+    query_errors = 0
+    for i in range(probes):
+        month = months[i % len(months)]
+        row_id = ids.take()
+        response = make_request("POST", "/api/v1/modify/async", {
+            "exec": f"INSERT INTO {BENCH_TABLE} (id, category, amount) VALUES (?, ?, ?)",
+            "params": [row_id, "probe", 0],
+            "month": month
+        })
+        if modify_failed(response):
+            write_failed += 1
+            continue
+
+        written_at = time.perf_counter()
+        first_seen = None
+        all_seen = None
+        errored = False
+        while time.perf_counter() - written_at < max_wait:
+            response = make_request("POST", "/api/v1/query/async", {
+                "query": f"SELECT id FROM {BENCH_TABLE} WHERE id = ?",
+                "params": [row_id],
+                "month": month
+            })
+            visibility = probe_visibility(response)
+            if visibility is None:
+                errored = True
+                break
+            elapsed_ms = (time.perf_counter() - written_at) * 1000
+            any_visible, all_visible = visibility
+            if any_visible and first_seen is None:
+                first_seen = elapsed_ms
+            if all_visible:
+                all_seen = elapsed_ms
+                break
+            time.sleep(poll_interval)
+
+        if first_seen is not None:
+            first_lags.append(first_seen)
+        if all_seen is not None:
+            all_lags.append(all_seen)
+        elif errored:
+            query_errors += 1
+        else:
+            timeouts += 1
+
+    report = {
+        "probes": probes,
+        "first_visible": len(first_lags),
+        "visible": len(all_lags),
+        "timed_out": timeouts,
+        "write_failed": write_failed,
+        "query_failed": query_errors
+    }
+    report.update(lag_stats("first_visible", first_lags))
+    report.update(lag_stats("all_visible", all_lags))
+    return report
+
+
+def diff_metrics(prefix, current, previous, diff):
+    for metric, value in current.items():
+        old = previous.get(metric)
+        if metric in NOT_COMPARED:
+            continue
+        if not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+            continue
+        # 基线为 0 时（例如失败数从 0 变为 N）无法计算百分比，只给出差值
+        change = None
+        if old != 0:
+            change = (value - old) / old * 100
+            if metric not in HIGHER_IS_BETTER:
+                change = -change
+            change = round(change, 2) + 0.0
+        diff[f"{prefix}.{metric}"] = {
+            "baseline": old,
+            "current": value,
+            "delta": round(value - old, 2),
+            "improvement_pct": change
+        }
+
+
+def diff_against_baseline(report, baseline):
+    """逐项对比当前结果与基线，improvement_pct 为正表示变好"""
+    diff = {}
+    for kind, metrics in report["workload"].items():
+        diff_metrics(f"workload.{kind}", metrics, baseline.get("workload", {}).get(kind, {}), diff)
+    diff_metrics("sync_lag", report["sync_lag"], baseline.get("sync_lag", {}), diff)
+    return diff
+
+
+def positive_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数: {text}")
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"必须大于 0: {text}")
+    return value
+
+
+def non_negative_int(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"不是整数: {text}")
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"不能小于 0: {text}")
+    return value
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in ("read", "write", "cross_month"):
+            raise argparse.ArgumentTypeError(f"未知的负载类型: {kind}")
+        try:
+            mix[kind] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的权重: {part}")
+        if mix[kind] < 0:
+            raise argparse.ArgumentTypeError(f"权重不能为负: {part}")
+    if sum(mix.values()) <= 0:
+        raise argparse.ArgumentTypeError("权重之和必须大于 0")
+    return mix
+
+
+def main():
+    global BASE_URL
+
+    parser = argparse.ArgumentParser(description='DuckDB Web API 基准测试')
+    parser.add_argument('--url', default=BASE_URL, help='服务地址')
+    parser.add_argument('--months', type=positive_int, default=3, help='参与测试的月份数（从 2000-01 起）')
+    parser.add_argument('--rows', type=non_negative_int, default=10000, help='每个月份预置的行数')
+    parser.add_argument('--seed-batch', type=positive_int, default=1000, help='预置数据时每批写入的行数')
+    parser.add_argument('--skip-seed', action='store_true',
+                        help='跳过数据预置，只删除上次运行写入的行（--rows 需与预置时一致）')
+    parser.add_argument('--concurrency', type=positive_int, default=20, help='并发数')
+    parser.add_argument('--requests', type=positive_int, default=2000, help='混合负载的请求总数')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix("read=8,write=1,cross_month=1"),
+                        help='负载比例，例如 read=8,write=1,cross_month=1')
+    parser.add_argument('--lag-probes', type=non_negative_int, default=20, help='同步延迟探测次数')
+    parser.add_argument('--lag-timeout', type=float, default=10, help='单次探测最长等待秒数')
+    parser.add_argument('--random-seed', type=int, default=42, help='随机种子，保证负载可复现')
+    parser.add_argument('--output', default='bench_output.txt', help='JSON 结果输出文件')
+    parser.add_argument('--baseline', help='用于对比的基线 JSON 文件')
+
+    args = parser.parse_args()
+    BASE_URL = args.url.rstrip('/')
+
+    # 使用固定的历史月份，避免污染当前月份的业务数据
+    months = [f"{2000 + i // 12}-{i % 12 + 1:02d}" for i in range(args.months)]
+    # 预置数据占用 1..rows，负载与探测写入从 rows + 1 起
+    ids = IdAllocator(args.rows + 1)
+
+    health = make_request("GET", "/health")
+    if health.get('status') != 'healthy':
+        print(f"错误: 服务不可用: {health}")
+        return 1
+
+    # 负载计划与预置数据各用独立的随机数生成器，是否跳过预置不影响请求序列
+    plan = build_plan(months, args.requests, args.mix, ids, random.Random(args.random_seed))
+
+    try:
+        if args.skip_seed:
+            reset(months, args.rows)
+        else:
+            seed(months, args.rows, args.seed_batch, random.Random(args.random_seed))
+    except RuntimeError as e:
+        print(f"错误: {e}")
+        return 1
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "url": BASE_URL,
+            "months": months,
+            "rows_per_month": args.rows,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "mix": args.mix,
+            "random_seed": args.random_seed
+        },
+        "workload": run_workload(plan, args.concurrency),
+        "sync_lag": measure_sync_lag(months, args.lag_probes, 0.01, args.lag_timeout, ids)
+    }
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            report["baseline_diff"] = diff_against_baseline(report, json.load(f))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print("\n=== 测试结果 ===")
+    print(output)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(output)
+    print(f"\n结果已写入: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())